@@ -4,6 +4,7 @@ import yaml
 from easydict import EasyDict as edict
 
 from .pipeline import PipeLine
+from .utils import SafeLoader
 
 
 class ParseKwargs(argparse.Action):
@@ -37,7 +38,7 @@ def main():
     args = get_args()
 
     with open(args.config, 'r') as fp:
-        cfg = edict(yaml.safe_load(fp))
+        cfg = edict(yaml.load(fp, Loader=SafeLoader))
 
     if args.tasks:
         if args.tasks in ['t', 'training']:
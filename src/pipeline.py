@@ -1,13 +1,13 @@
 import copy
+import os
 import os.path as osp
 import shutil
 import time
-from pathlib import Path
 
 import yaml
 from easydict import EasyDict as edict
 
-from .utils import run_docker_cmd
+from .utils import SafeLoader, run_docker_cmd
 from .verifier_detection import VerifierDetection
 from .verifier_segmentation import VerifierSegmentation
 
@@ -50,23 +50,33 @@ class PipeLine(object):
 
         """
         self.host_in_dir = self.data_dir
+        assert osp.isdir(self.data_dir), f'data_dir {self.data_dir} is not a directory'
+
+        # list data_dir once instead of stat each path, most of them are direct children of data_dir
+        entries = {osp.normpath(entry.path): entry for entry in os.scandir(self.data_dir)}
+
+        def is_valid(host_path: str, is_file: bool) -> bool:
+            entry = entries.get(osp.normpath(host_path))
+            if entry is None:
+                return osp.isfile(host_path) if is_file else osp.isdir(host_path)
+            return entry.is_file() if is_file else entry.is_dir()
 
         assets_dir = self.get_host_path(self.cfg.env_config.input.assets_dir)
         annotations_dir = self.get_host_path(self.cfg.env_config.input.annotations_dir)
 
-        assert osp.isdir(assets_dir)
-        assert osp.isdir(annotations_dir)
+        assert is_valid(assets_dir, is_file=False)
+        assert is_valid(annotations_dir, is_file=False)
 
         for task in self.cfg.tasks:
             if task == 'training':
                 training_index_file = self.get_host_path(self.cfg.env_config.input.training_index_file)
                 val_index_file = self.get_host_path(self.cfg.env_config.input.val_index_file)
-                assert osp.isfile(training_index_file)
-                assert osp.isfile(val_index_file)
+                assert is_valid(training_index_file, is_file=True)
+                assert is_valid(val_index_file, is_file=True)
             elif task in ['mining', 'infer']:
                 candidate_index_file = self.get_host_path(self.cfg.env_config.input.candidate_index_file)
 
-                assert osp.isfile(candidate_index_file)
+                assert is_valid(candidate_index_file, is_file=True)
 
         self.host_in_dir = ''
 
@@ -74,17 +84,13 @@ class PipeLine(object):
         """
         convert the input/output file path from docker to host
         """
-        if Path(self.docker_out_dir) in Path(docker_file_path).parents:
-            docker_root_dir = self.docker_out_dir
-            host_root_dir = self.host_out_dir
-        elif Path(self.docker_in_dir) in Path(docker_file_path).parents:
-            docker_root_dir = self.docker_in_dir
-            host_root_dir = self.host_in_dir
-        else:
-            raise Exception(f'unknown docker file path {docker_file_path}')
-        host_file_path = osp.join(host_root_dir, osp.relpath(docker_file_path, start=docker_root_dir))
-
-        return host_file_path
+        docker_roots = ((self.docker_out_dir.rstrip('/') + '/', self.host_out_dir),
+                        (self.docker_in_dir.rstrip('/') + '/', self.host_in_dir))
+        for docker_root_dir, host_root_dir in docker_roots:
+            if docker_file_path.startswith(docker_root_dir):
+                return osp.join(host_root_dir, docker_file_path[len(docker_root_dir):].lstrip('/'))
+
+        raise Exception(f'unknown docker file path {docker_file_path}')
 
     def get_object_type(self) -> int:
         """
@@ -96,7 +102,7 @@ class PipeLine(object):
         command = 'cat /img-man/manifest.yaml'
         try:
             output = run_docker_cmd(self.docker_image, command.split())
-            manifest = yaml.safe_load(output)
+            manifest = yaml.load(output, Loader=SafeLoader)
         except:
             return 2
 
@@ -106,9 +112,9 @@ class PipeLine(object):
         """
         support tmi and ttmi
         """
+        # the manifest is fixed for a docker image, read it once for all tasks
+        object_type = self.get_object_type()
         for idx, task in enumerate(self.cfg.tasks):
-            object_type = self.get_object_type()
-
             if idx > 0 and task == 'training':
                 self.cfg.in_dir = osp.join(self.work_dir, self.task_id, 'pretrain', 'in')
                 self.cfg.out_dir = osp.join(self.work_dir, self.task_id, 'pretrain', 'out')
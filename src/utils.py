@@ -4,6 +4,15 @@ import warnings
 from pprint import pprint
 from typing import Dict, List
 
+import yaml
+
+try:
+    # use the libyaml backend when available, it is much faster than the pure python one
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader  # type: ignore
+
 
 def print_error(result: Dict):
     error_count = 0
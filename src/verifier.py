@@ -7,7 +7,6 @@ import shutil
 import time
 import unittest
 import warnings
-from pathlib import Path
 from pprint import pprint
 from typing import List
 
@@ -15,17 +14,35 @@ import docker
 import yaml
 from easydict import EasyDict as edict
 
-from .utils import append_binds, run_cmd, run_docker_cmd
+from .utils import SafeDumper, SafeLoader, append_binds, run_cmd, run_docker_cmd
 
 
 def todict(cfg):
     if isinstance(cfg, dict):
         return {key: todict(value) for key, value in cfg.items()}
+    elif isinstance(cfg, list):
+        return [todict(value) for value in cfg]
     else:
         return cfg
 
 
+# the pretrained weight files key in /in/config.yaml for each task
+_MODEL_PARAMS_KEYS = dict(training='pretrained_model_params', infer='model_params_path', mining='model_params_path')
+
+# the task flags in /in/env.yaml for each task
+_ENV_TASK_CONFIGS = dict(training=dict(run_training=True, run_mining=False, run_infer=False),
+                         infer=dict(run_training=False, run_mining=False, run_infer=True),
+                         mining=dict(run_training=False, run_mining=True, run_infer=False))
+
+# the index files in /in/env.yaml not used by each task, will be set to ''
+_ENV_UNUSED_INPUTS = dict(training=('candidate_index_file', ),
+                          infer=('training_index_file', 'val_index_file'),
+                          mining=('training_index_file', 'val_index_file'))
+
+
 class Verifier(unittest.TestCase):
+    SUPPORTED_TASKS = frozenset({'training', 'mining', 'infer'})
+    SUPPORTED_ALGORITHMS = frozenset({'detection', 'segmentation', 'classification'})
 
     def __init__(self, cfg: edict):
         """use in_dir and out_dir to run single task
@@ -41,25 +58,33 @@ class Verifier(unittest.TestCase):
         super().__init__()
         warnings.simplefilter('ignore', ResourceWarning)
 
-        self.supported_tasks = ['training', 'mining', 'infer']
-        self.supported_algorithms = ['detection', 'segmentation', 'classification']
         # docker image config
         self.cfg = copy.deepcopy(cfg)
         self.task_id = self.cfg.get('task_id', str(round(time.time())))
         self.gpu_id = self.cfg.get('gpu_id', '0')
+        # the real gpu id will map to fake gpu id in docker, eg: '2,3' --> '0,1'
+        self.gpu_count = str(self.gpu_id).count(',') + 1
+        self.docker_gpu_id = ','.join([str(i) for i in range(self.gpu_count)])
         self.class_names = self.cfg.class_names
 
         in_dir = self.cfg.in_dir
         out_dir = self.cfg.out_dir
+        # check the mount directories before start any docker container
         if self.cfg.get('data_dir', None):
+            assert osp.isdir(self.cfg.data_dir), f'data_dir {self.cfg.data_dir} is not a directory'
             os.makedirs(self.cfg.in_dir, exist_ok=True)
             os.makedirs(self.cfg.out_dir, exist_ok=True)
         else:
-            assert osp.isdir(in_dir)
-            assert out_dir
+            assert osp.isdir(in_dir), f'in_dir {in_dir} is not a directory'
+            assert out_dir, 'out_dir is not set'
             os.makedirs(out_dir, exist_ok=True)
         self.host_in_dir = os.path.abspath(in_dir)
         self.host_out_dir = os.path.abspath(out_dir)
+        # the host path for /in/config.yaml and /in/env.yaml
+        self.host_in_config_file = osp.join(self.host_in_dir, 'config.yaml')
+        self.host_in_env_file = osp.join(self.host_in_dir, 'env.yaml')
+        # the base volumes for `docker run`, extra binds are appended in create_workspace
+        self.docker_volumes = [f'-v{self.host_in_dir}:/in:ro', f'-v{self.host_out_dir}:/out:rw']
 
         self.pretrain_files = []
         self.pretrain_weights_dir = osp.abspath(self.cfg.get('pretrain_weights_dir', './pretrain_weights_dir'))
@@ -80,7 +105,7 @@ class Verifier(unittest.TestCase):
             self.env_config_file = self.cfg.get('env_config_file', './env.yaml')
             if osp.exists(self.env_config_file):
                 with open(self.env_config_file, 'r') as fp:
-                    self.env_config = yaml.safe_load(fp)
+                    self.env_config = yaml.load(fp, Loader=SafeLoader)
             else:
                 self.env_config = self.get_default_env()
 
@@ -96,15 +121,15 @@ class Verifier(unittest.TestCase):
             test_config_file = self.cfg.get('param_config_file', './test-config.yaml')
             if osp.exists(test_config_file):
                 with open(test_config_file, 'r') as fp:
-                    self.param_config = yaml.safe_load(fp)
+                    self.param_config = yaml.load(fp, Loader=SafeLoader)
             else:
-                for task in self.supported_tasks:
+                for task in self.SUPPORTED_TASKS:
                     self.param_config[task] = dict()
 
         # set pretrain_files to /in/config.yaml
         # note this will overwrite custom value
         if self.pretrain_files:
-            for task in self.supported_tasks:
+            for task in self.SUPPORTED_TASKS:
                 if task == 'training':
                     if 'pretrained_model_params' in self.param_config[task]:
                         warnings.warn(f'overwrite test config {task} pretrained_model_params')
@@ -116,22 +141,25 @@ class Verifier(unittest.TestCase):
 
         # docker client
         self.docker_image = self.cfg.get('docker_image', 'youdaoyzbx/ymir-executor:ymir2.1.0-mmyolo-cu113-tmi')
+        self._api = None
+
+    @property
+    def api(self) -> docker.APIClient:
+        """the low-level docker api client, create on first use and reuse it for the verifier lifetime"""
+        if self._api is None:
+            self._api = docker.APIClient(**docker.utils.kwargs_from_env())
+        return self._api
 
     def get_host_path(self, docker_file_path: str):
         """
         convert the input/output file path from docker to host
         """
-        if Path('/out') in Path(docker_file_path).parents:
-            docker_root_dir = '/out'
-            host_root_dir = self.host_out_dir
-        elif Path('/in') in Path(docker_file_path).parents:
-            docker_root_dir = '/in'
-            host_root_dir = self.host_in_dir
-        else:
-            raise Exception(f'unknown docker file path {docker_file_path}')
-        host_file_path = osp.join(host_root_dir, osp.relpath(docker_file_path, start=docker_root_dir))
+        docker_roots = (('/out/', self.host_out_dir), ('/in/', self.host_in_dir))
+        for docker_root_dir, host_root_dir in docker_roots:
+            if docker_file_path.startswith(docker_root_dir):
+                return osp.join(host_root_dir, docker_file_path[len(docker_root_dir):].lstrip('/'))
 
-        return host_file_path
+        raise Exception(f'unknown docker file path {docker_file_path}')
 
     def verify_docker_path(self, docker_path, is_file=True):
         host_path = self.get_host_path(docker_path)
@@ -142,8 +170,8 @@ class Verifier(unittest.TestCase):
             return osp.isdir(host_path), host_path
 
     def verify_exist(self, docker_image_name: str) -> None:
-        client = docker.from_env()
-        client.images.get(docker_image_name)
+        """raise docker.errors.ImageNotFound if the docker image not exist"""
+        self.api.inspect_image(docker_image_name)
 
     def get_default_env(self) -> dict:
         """
@@ -233,16 +261,17 @@ class Verifier(unittest.TestCase):
         self.data_dir = self.cfg.get('data_dir', None)
         self.work_dir = self.cfg.get('work_dir', None)
 
-        volumes = [f'-v{osp.abspath(self.cfg.in_dir)}:/in:ro', f'-v{osp.abspath(self.cfg.out_dir)}:/out:rw']
+        volumes = self.docker_volumes.copy()
 
         if self.data_dir is not None:
             basename_assets_dir = osp.relpath(self.cfg.env_config.input.assets_dir, start=self.docker_in_dir)
             basename_anntations_dir = osp.relpath(self.cfg.env_config.input.annotations_dir, start=self.docker_in_dir)
+            host_data_dir = osp.abspath(self.data_dir)
             for subdir in [basename_assets_dir, basename_anntations_dir]:
-                src_dir = osp.join(osp.abspath(self.data_dir), subdir)
-                des_dir = osp.join(osp.abspath(self.cfg.in_dir), subdir)
+                src_dir = osp.join(host_data_dir, subdir)
+                des_dir = osp.join(self.host_in_dir, subdir)
                 if osp.exists(des_dir):
-                    warnings.warn(f'{des_dir} already exist, not needs to create soft link')
+                    logging.info(f'{des_dir} already exist, not needs to create soft link')
                 else:
                     os.symlink(src_dir, des_dir)
                 append_binds(volumes, src_dir)
@@ -255,18 +284,16 @@ class Verifier(unittest.TestCase):
             basename_models_dir = osp.relpath(self.cfg.env_config.input.models_dir, start=self.docker_in_dir)
 
             src_dir = osp.abspath(pretrain_weights_dir)
-            des_dir = osp.join(osp.abspath(self.cfg.in_dir), basename_models_dir)
+            des_dir = osp.join(self.host_in_dir, basename_models_dir)
             if osp.exists(des_dir):
-                warnings.warn(f'{des_dir} already exist, not needs to create soft link')
+                logging.info(f'{des_dir} already exist, not needs to create soft link')
             else:
                 os.symlink(src_dir, des_dir)
             append_binds(volumes, src_dir)
 
         # generate config.yaml and env.yaml
-        in_config_file = osp.join(self.cfg.in_dir, 'config.yaml')
-        env_config_file = osp.join(self.cfg.in_dir, 'env.yaml')
-        self.generate_hyperparameter_yaml(task, in_config_file)
-        self.generate_env_yaml(task, env_config_file)
+        self.generate_hyperparameter_yaml(task, self.host_in_config_file)
+        self.generate_env_yaml(task, self.host_in_env_file)
 
         # copy train-index.tsv, val-index.tsv, candidate-index.tsv
         if self.data_dir is not None:
@@ -285,78 +312,38 @@ class Verifier(unittest.TestCase):
         return volumes
 
     def generate_hyperparameter_yaml(self, task: str, in_config_file: str) -> None:
-        assert task in ['training', 'infer', 'mining'], f'task is {task}'
+        assert task in self.SUPPORTED_TASKS, f'task is {task}'
 
         output = run_docker_cmd(self.docker_image, f'cat /img-man/{task}-template.yaml'.split())
 
-        template_config = yaml.safe_load(output)
-
-        # the real gpu id
-        real_gpu_id: str = self.gpu_id
-        gpu_count: int = len(real_gpu_id.split(','))
-        # the fake gpu id
-        gpu_id = ','.join([str(i) for i in range(gpu_count)])
-
-        task_id = self.task_id
-        if task == 'training':
-            task_config = dict(gpu_id=gpu_id,
-                               gpu_count=gpu_count,
-                               task_id=task_id,
-                               class_names=self.class_names,
-                               pretrained_model_params=self.pretrain_files)
-
-            in_config = template_config.copy()
-            in_config.update(task_config)
-        elif task == 'infer':
-            task_config = dict(gpu_id=gpu_id,
-                               gpu_count=gpu_count,
-                               task_id=task_id,
-                               class_names=self.class_names,
-                               model_params_path=self.pretrain_files)
-
-            in_config = template_config.copy()
-            in_config.update(task_config)
-        elif task == 'mining':
-            task_config = dict(gpu_id=gpu_id,
-                               gpu_count=gpu_count,
-                               task_id=task_id,
-                               class_names=self.class_names,
-                               model_params_path=self.pretrain_files)
-
-            in_config = template_config.copy()
-            in_config.update(task_config)
-        else:
-            raise Exception(f'unknown task name {task}')
+        template_config = yaml.load(output, Loader=SafeLoader)
+
+        task_config = dict(gpu_id=self.docker_gpu_id,
+                           gpu_count=self.gpu_count,
+                           task_id=self.task_id,
+                           class_names=self.class_names)
+        task_config[_MODEL_PARAMS_KEYS[task]] = self.pretrain_files
 
         ### apply user define config
-        if self.param_config[task]:
-            in_config.update(self.param_config[task])
-            logging.info(f'modify training template config with {self.param_config[task]}')
+        user_config = self.param_config[task] or {}
+        if user_config:
+            logging.info(f'modify training template config with {user_config}')
+        in_config = {**template_config, **task_config, **user_config}
 
+        # dump to string first, then write the file at once
+        payload = yaml.dump(in_config, Dumper=SafeDumper)
         with open(in_config_file, 'w') as fp:
-            yaml.dump(in_config, fp)
+            fp.write(payload)
 
     def generate_env_yaml(self, task: str, env_config_file: str) -> None:
-        env_config = self.env_config.copy()
-        task_id = self.task_id
-
-        if task == 'training':
-            task_config = dict(run_training=True, run_mining=False, run_infer=False, task_id=task_id)
-            env_config['input']['candidate_index_file'] = ''
-        elif task == 'infer':
-            task_config = dict(run_training=False, run_mining=False, run_infer=True, task_id=task_id)
-            env_config['input']['training_index_file'] = ''
-            env_config['input']['val_index_file'] = ''
-        elif task == 'mining':
-            task_config = dict(run_training=False, run_mining=True, run_infer=False, task_id=task_id)
-            env_config['input']['training_index_file'] = ''
-            env_config['input']['val_index_file'] = ''
-        else:
+        if task not in _ENV_TASK_CONFIGS:
             raise Exception(f'unknown task {task}')
 
-        env_config.update(task_config)
+        env_input = {**self.env_config['input'], **dict.fromkeys(_ENV_UNUSED_INPUTS[task], '')}
+        env_config = {**self.env_config, **_ENV_TASK_CONFIGS[task], 'input': env_input, 'task_id': self.task_id}
+        payload = yaml.dump(env_config, Dumper=SafeDumper)
         with open(env_config_file, 'w') as fw:
-            yaml.dump(env_config, fw)
+            fw.write(payload)
 
     def run_task(self, task: str, pretrain_weights_dir: str = ''):
         print(f'run {task} task {self.task_id} with follow config')
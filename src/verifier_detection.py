@@ -7,15 +7,16 @@ from typing import List
 import yaml
 from easydict import EasyDict as edict
 
+from .utils import SafeLoader
 from .verifier import Verifier
 
 
 class VerifierDetection(Verifier):
+    SUPPORTED_ALGORITHMS = frozenset({'detection'})
 
     def __init__(self, cfg: edict):
         super().__init__(cfg)
         self.object_type = 2
-        self.supported_algorithms = ['detection']
 
     def verify(self,
                docker_image_name: str = 'youdaoyzbx/ymir-executor:ymir1.1.0-yolov5-cu111-tmi',
@@ -96,7 +97,7 @@ class VerifierDetection(Verifier):
         2. check saved file
         """
         with open(training_result_file, 'r') as fp:
-            result = yaml.safe_load(fp)
+            result = yaml.load(fp, Loader=SafeLoader)
 
         if 'map' in result:
             self.assertTrue(isinstance(result['map'], (float, int)) or result['map'].isnumeric(),
@@ -3,20 +3,17 @@ import os.path as osp
 from typing import List
 
 import yaml
-from easydict import EasyDict as edict
 
+from .utils import SafeLoader
 from .verifier_detection import VerifierDetection
 
 
 class VerifierSegmentation(VerifierDetection):
-
-    def __init__(self, cfg: edict):
-        super().__init__(cfg)
-        self.supported_algorithms = ['segmentation']
+    SUPPORTED_ALGORITHMS = frozenset({'segmentation'})
 
     def verify_training_result_file(self, training_result_file) -> None:
         with open(training_result_file, 'r') as fp:
-            result = yaml.safe_load(fp)
+            result = yaml.load(fp, Loader=SafeLoader)
 
         if self.object_type == 2:
             metric = 'mAP'
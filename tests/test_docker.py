@@ -1,4 +1,5 @@
 import os.path as osp
+import sys
 import unittest
 
 import docker
@@ -25,37 +26,46 @@ class TestDocker(unittest.TestCase):
         volumes = [f'{self.ymir_in_dir}:/in:ro', f'{self.ymir_out_dir}:/out:rw',
                    f'{self.ymir_model_dir}:/models:ro']  # not support mount to /in/models
 
+        run_kwargs = dict(
+            image=target_image,
+            command=command,
+            runtime='nvidia',
+            auto_remove=True,
+            volumes=volumes,
+            environment=['YMIR_VERSION=1.1.0'],  # support for ymir1.1.0/1.2.0/1.3.0/2.0.0
+            shm_size='64G')
+
         for detach in [True, False]:
             if detach:
-                container = self.client.containers.run(
-                    image=target_image,
-                    command=command,
-                    runtime='nvidia',
-                    auto_remove=True,
-                    volumes=volumes,
-                    environment=['YMIR_VERSION=1.1.0'],  # support for ymir1.1.0/1.2.0/1.3.0/2.0.0
-                    shm_size='64G',
-                    detach=detach)
+                container = self.client.containers.run(**run_kwargs, detach=detach)
 
                 print('use follow command to view docker logs')
                 print(f'docker logs -f {container.short_id}')
                 # container.start()
                 stream = container.logs(stream=True, follow=True)
-                for line in stream:
-                    print(line.decode('utf-8'), end='')
+                # write the raw bytes to the buffered stdout, no need to decode each chunk
+                sys.stdout.flush()
+                write = sys.stdout.buffer.write
+                try:
+                    for chunk in stream:
+                        write(chunk)
+                    sys.stdout.buffer.flush()
+                except BrokenPipeError:
+                    # stdout is gone before the container exits, wait for it and fail the test now
+                    try:
+                        self.client.api.wait(container.id)
+                    except docker.errors.NotFound:
+                        # auto_remove=True, the container already exited and was removed
+                        pass
+                    raise
+                # a fully drained log stream ends when the container exits, no need to wait for it
                 print('\n')
-                container.wait()
             else:
                 print('this task may take long time, view `docker ps` and `docker logs -f xxx` for process')
-                run_result = self.client.containers.run(image=target_image,
-                                                        command=command,
-                                                        runtime='nvidia',
-                                                        auto_remove=True,
-                                                        volumes=volumes,
-                                                        shm_size='64G',
-                                                        detach=detach,
-                                                        stderr=True,
-                                                        stdout=True)
-                print(run_result.decode('utf-8'))
+                run_result = self.client.containers.run(**run_kwargs, detach=detach, stderr=True, stdout=True)
+                # the output may be large, write the bytes without decoding
+                sys.stdout.flush()
+                sys.stdout.buffer.write(run_result)
+                sys.stdout.buffer.flush()
 
         self.assertTrue(True)